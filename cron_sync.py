@@ -4,7 +4,7 @@ import logging
 import pandas as pd
 from datetime import timedelta
 
-from utils.sheets import ler_aba
+from utils.sheets import ler_coluna, converter_datas_planilha
 from utils.sync import sincronizar_shopify_com_planilha, _reagregar_clientes
 
 # ======================================================
@@ -31,19 +31,14 @@ def descobrir_data_inicio() -> str:
     e retorna essa data menos 1 minuto (ISO 8601).
     """
     try:
-        df = ler_aba(PLANILHA, ABA_PEDIDOS)
+        # Só a coluna de datas (não a aba inteira)
+        datas = ler_coluna(PLANILHA, ABA_PEDIDOS, "Data de criação")
 
-        if df.empty or "Data de criação" not in df.columns:
+        if datas.empty:
             logger.warning("⚠️ Nenhuma data encontrada, usando fallback inicial")
             return "2023-01-01T00:00:00-03:00"
 
-        df["Data de criação"] = pd.to_datetime(
-            df["Data de criação"],
-            errors="coerce",
-            utc=True
-        )
-
-        ultima_data = df["Data de criação"].max()
+        ultima_data = converter_datas_planilha(datas, utc=True).max()
 
         if pd.isna(ultima_data):
             logger.warning("⚠️ Data inválida, usando fallback inicial")
@@ -2,11 +2,17 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import time
+from datetime import datetime
 
 from utils.sync import sincronizar_shopify_completo
-from utils.sheets import ler_aba
-from utils.classificacao import calcular_ciclo_medio
+from utils.sheets import ler_aba, converter_datas_planilha
+from utils.classificacao import (
+    calcular_ciclo_medio,
+    calcular_metricas_gerais,
+    converter_categoria
+)
 
 
 # ======================================================
@@ -43,13 +49,196 @@ PLANILHA = "Clientes Shopify"
 ABA_CLIENTES = "Clientes Shopify"
 ABA_PEDIDOS = "Pedidos Shopify"
 
+ESTADOS_OPERACIONAIS = ["🟢 Ativo", "🚨 Em risco", "💤 Dormente"]
+CLASSIFICACOES = ["Iniciante", "Promissor", "Leal", "Campeão"]
+
+# Colunas exibidas nas tabelas (também usadas para estreitar as partições)
+COLUNAS_DISPLAY = [
+    "Cliente",
+    "Telefone",
+    "Email",
+    "Estado Operacional",
+    "Nível",
+    "Qtd Pedidos",
+    "Valor Total",
+    "Último Pedido",
+    "Dias sem comprar"
+]
+
+# Colunas da aba de clientes usadas pelo painel (validação, métricas, ciclo e tabelas)
+COLUNAS_CLIENTES = [
+    "Customer ID",
+    "Cliente",
+    "Email",
+    "Telefone",
+    "Estado",
+    "Nível",
+    "Qtd Pedidos",
+    "Valor Total",
+    "Primeiro Pedido",
+    "Último Pedido",
+    "Dias sem comprar"
+]
+
+# Categorias fixas: comparações e groupby viram operações sobre códigos
+TIPOS_CATEGORICOS = {
+    "Nível": pd.CategoricalDtype(CLASSIFICACOES, ordered=True),
+    "Estado": pd.CategoricalDtype(ESTADOS_OPERACIONAIS),
+    "Estado Operacional": pd.CategoricalDtype(ESTADOS_OPERACIONAIS),
+}
+
+CACHE_TTL = 1200  # 20 minutos
+
+# 1,234.56 → 1.234,56 (troca vírgula e ponto numa única passada)
+SEPARADORES_BR = str.maketrans(",.", ".,")
+
 
 # ======================================================
-# 📦 CARREGAMENTO DOS CLIENTES (JÁ AGREGADOS)
+# 🧱 ESTADO OPERACIONAL FIXO (REGRA DA EQUIPE)
 # ======================================================
-@st.cache_data(ttl=1200)  # 20 minutos
+def calcular_estado_operacional(dias: pd.Series) -> np.ndarray:
+    return np.select(
+        [dias.isna(), dias >= 120, dias >= 60],
+        [None, "💤 Dormente", "🚨 Em risco"],
+        default="🟢 Ativo"
+    )
+
+
+# ======================================================
+# 📦 CARREGAMENTO DOS CLIENTES (JÁ AGREGADOS E NORMALIZADOS)
+# ======================================================
+@st.cache_data(ttl=CACHE_TTL)
 def carregar_clientes():
-    return ler_aba(PLANILHA, ABA_CLIENTES)
+    """
+    Lê a aba de clientes e devolve o DataFrame já normalizado.
+
+    Toda a normalização fica dentro do cache: interações com os
+    filtros (que re-executam o script) não repetem esse trabalho.
+    """
+    return _normalizar_clientes(ler_aba(PLANILHA, ABA_CLIENTES))
+
+
+def _normalizar_clientes(df: pd.DataFrame) -> pd.DataFrame:
+    if df.empty:
+        return df
+
+    # 🔧 NORMALIZAÇÃO DE COLUNAS (descarta o que o painel não usa)
+    df.columns = df.columns.str.strip()
+    df = df.drop(columns=df.columns.difference(COLUNAS_CLIENTES))
+
+    if "Telefone" in df.columns:
+        df["Telefone"] = df["Telefone"].astype(str).replace("nan", "").str.strip()
+
+    # 🔢 GARANTIR QUE "Dias sem comprar" É NUMÉRICO
+    if "Dias sem comprar" in df.columns:
+        df["Dias sem comprar"] = pd.to_numeric(
+            df["Dias sem comprar"],
+            errors="coerce"
+        )
+        df["Estado Operacional"] = calcular_estado_operacional(df["Dias sem comprar"])
+
+    # 🗜️ TIPOS ENXUTOS: rótulos repetidos viram category, contagem vira int
+    for col, tipo in TIPOS_CATEGORICOS.items():
+        if col in df.columns:
+            df[col] = converter_categoria(df[col], tipo)
+
+    if "Qtd Pedidos" in df.columns:
+        df["Qtd Pedidos"] = pd.to_numeric(
+            df["Qtd Pedidos"],
+            errors="coerce",
+            downcast="integer"
+        )
+
+    # Dias como inteiro nullable (clientes sem data ficam NA; estado já calculado).
+    # Célula absurda (fora do int32/inf) vira NA em vez de derrubar o cast
+    if "Dias sem comprar" in df.columns:
+        dias = df["Dias sem comprar"].round()
+        df["Dias sem comprar"] = dias.where(
+            dias.abs() <= np.iinfo(np.int32).max
+        ).astype("Int32")
+
+    # 🔃 DATAS PARSEADAS UMA VEZ (formato ISO explícito) + ORDENAÇÃO ÚNICA
+    for col in ("Primeiro Pedido", "Último Pedido"):
+        if col in df.columns:
+            df[col] = converter_datas_planilha(df[col])
+
+    if "Último Pedido" in df.columns:
+        df = df.sort_values(
+            "Último Pedido",
+            ascending=False,
+            kind="stable",
+            ignore_index=True
+        )
+
+    return df
+
+
+# ======================================================
+# FUNÇÃO AUXILIAR: FORMATAR TABELA
+# ======================================================
+def formatar_tabela(df_input: pd.DataFrame) -> pd.DataFrame:
+    """
+    Formata DataFrame para exibição:
+    - Valor Total → formato brasileiro (R$ 1.234,56)
+    - Último Pedido → data brasileira (dd/mm/yyyy HH:MM), "-" se vazia
+
+    Roda uma vez por carga, dentro de carregar_segmentos; "Último Pedido"
+    já chega como datetime (e ordenado) do carregamento.
+    """
+    # Só as colunas formatadas são novas; as demais não são copiadas
+    return df_input.assign(**{
+        "Valor Total": [
+            f"R$ {x:,.2f}".translate(SEPARADORES_BR)
+            for x in df_input["Valor Total"].to_numpy()
+        ],
+        "Último Pedido": (
+            df_input["Último Pedido"]
+            .dt.strftime("%d/%m/%Y %H:%M")
+            .fillna("-")
+        ),
+    })
+
+
+# ======================================================
+# 🧩 PARTIÇÕES POR ESTADO OPERACIONAL (CACHEADAS)
+# ======================================================
+@st.cache_data(ttl=CACHE_TTL)
+def carregar_segmentos() -> dict:
+    """
+    Separa os clientes por Estado Operacional uma única vez.
+
+    Cada seção passa a filtrar apenas a própria partição pelo nível,
+    em vez de varrer a base inteira a cada rerun.
+    """
+    # Projeta só as colunas exibidas e já formata o valor (uma vez por carga)
+    df = formatar_tabela(carregar_clientes()[COLUNAS_DISPLAY])
+
+    # Sem nível o cliente nunca passa no filtro; descarta uma vez aqui
+    df = df[df["Nível"].notna()]
+
+    # Um único groupby separa os três estados (em vez de três varreduras)
+    grupos = dict(list(df.groupby("Estado Operacional", observed=True, sort=False)))
+
+    return {
+        estado: grupos.get(estado, df.iloc[0:0]).reset_index(drop=True)
+        for estado in ESTADOS_OPERACIONAIS
+    }
+
+
+# ======================================================
+# 📊 INDICADORES DERIVADOS (CACHEADOS)
+# ======================================================
+@st.cache_data(ttl=CACHE_TTL)
+def carregar_ciclo() -> dict:
+    """Ciclo médio de compra da base (só muda quando os dados mudam)."""
+    return calcular_ciclo_medio(carregar_clientes())
+
+
+@st.cache_data(ttl=CACHE_TTL)
+def carregar_metricas() -> dict:
+    """Métricas do topo da página (só mudam quando os dados mudam)."""
+    return calcular_metricas_gerais(carregar_clientes())
+
 
 # ======================================================
 # 🔄 SINCRONIZAÇÃO SHOPIFY
@@ -77,6 +266,9 @@ with col_sync2:
                     st.success(resultado["mensagem"])
                     # Limpar cache específico
                     carregar_clientes.clear()
+                    carregar_segmentos.clear()
+                    carregar_ciclo.clear()
+                    carregar_metricas.clear()
                     st.rerun()  # Recarregar app automaticamente
                 elif resultado["status"] == "warning":
                     st.warning(resultado["mensagem"])
@@ -103,36 +295,9 @@ if df.empty:
     st.warning("⚠️ Nenhum cliente encontrado. Execute a sincronização primeiro.")
     st.stop()
 
-df["Telefone"] = df["Telefone"].astype(str).replace("nan", "").str.strip()
-
-# ======================================================
-# 🔢 GARANTIR QUE "Dias sem comprar" É NUMÉRICO
-# ======================================================
-df["Dias sem comprar"] = pd.to_numeric(
-    df["Dias sem comprar"],
-    errors="coerce"
-)
-
 # ======================================================
-# 🧱 ESTADO OPERACIONAL FIXO (REGRA DA EQUIPE)
+# 🔧 VALIDAR COLUNAS OBRIGATÓRIAS (AGORA USA "Nível")
 # ======================================================
-def calcular_estado_operacional(dias):
-    if pd.isna(dias):
-        return None
-    if dias >= 120:
-        return "💤 Dormente"
-    if dias >= 60:
-        return "🚨 Em risco"
-    return "🟢 Ativo"
-
-df["Estado Operacional"] = df["Dias sem comprar"].apply(calcular_estado_operacional)
-
-# ======================================================
-# 🔧 NORMALIZAÇÃO DE COLUNAS
-# ======================================================
-df.columns = df.columns.str.strip()
-
-# Validar colunas obrigatórias (AGORA USA "Nível")
 colunas_obrigatorias = [
     "Customer ID",
     "Cliente", 
@@ -161,7 +326,7 @@ with st.expander("📊 Análise de Ciclo de Compra (referência estratégica)",
     st.write("### Validação dos critérios de classificação")
     
     try:
-        ciclo = calcular_ciclo_medio(df)
+        ciclo = carregar_ciclo()
         
         if ciclo["total_recorrentes"] >= 5:
             col1, col2 = st.columns(2)
@@ -234,16 +399,19 @@ st.divider()
 # ======================================================
 col1, col2, col3, col4 = st.columns(4)
 
-total_clientes = len(df)
-faturamento_total = df["Valor Total"].sum()
-total_campeoes = len(df[df["Nível"] == "Campeão"])
-total_em_risco = len(df[df["Estado"] == "🚨 Em risco"])
+# Uma contagem por coluna (value_counts), calculada uma vez por carga
+metricas = carregar_metricas()
+
+total_clientes = metricas["total_clientes"]
+faturamento_total = metricas["faturamento_total"]
+total_campeoes = metricas["total_campeoes"]
+total_em_risco = metricas["total_em_risco"]
 
 col1.metric("👥 Total de clientes", f"{total_clientes:,}".replace(",", "."))
 
 col2.metric(
     "💰 Faturamento total",
-    f"R$ {faturamento_total:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    f"R$ {faturamento_total:,.2f}".translate(SEPARADORES_BR)
 )
 
 col3.metric("🏆 Campeões", total_campeoes)
@@ -253,173 +421,96 @@ st.divider()
 
 
 # ======================================================
-# 📋 CONFIGURAÇÃO DAS TABELAS (AGORA USA "Nível")
+# 🧩 SEGMENTOS (PARTIÇÕES CACHEADAS POR ESTADO)
 # ======================================================
-COLUNAS_DISPLAY = [
-    "Cliente",
-    "Telefone",
-    "Email",
-    "Estado Operacional",
-    "Nível",
-    "Qtd Pedidos",
-    "Valor Total",
-    "Último Pedido",
-    "Dias sem comprar"
-]
-
-CLASSIFICACOES = ["Iniciante", "Promissor", "Leal", "Campeão"]
+segmentos = carregar_segmentos()
 
 
 # ======================================================
-# FUNÇÃO AUXILIAR: FORMATAR TABELA
+# FUNÇÃO AUXILIAR: RENDERIZAR SEÇÃO
 # ======================================================
-def formatar_tabela(df_input: pd.DataFrame) -> pd.DataFrame:
+# Fragmento: mudar o filtro de uma seção re-executa só essa seção
+@st.fragment
+def render_secao(
+    titulo: str,
+    estado: str,
+    rotulo_filtro: str,
+    chave_filtro: str,
+    mensagem_vazia: str
+):
     """
-    Formata DataFrame para exibição:
-    - Valor Total → formato brasileiro (R$ 1.234,56)
-    - Último Pedido → data brasileira (dd/mm/yyyy)
+    Renderiza uma seção (filtro por nível + total + tabela) de um estado.
+
+    Args:
+        titulo: Subtítulo da seção
+        estado: Chave da partição em `segmentos` (Estado Operacional)
+        rotulo_filtro: Rótulo do multiselect de nível
+        chave_filtro: Key do widget no session_state
+        mensagem_vazia: Texto exibido quando não há clientes
     """
-    df_display = df_input[COLUNAS_DISPLAY].copy()
-    
-    # Formatar valor monetário
-    df_display["Valor Total"] = df_display["Valor Total"].apply(
-        lambda x: f"R$ {x:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-    )
-    
-    # ======================================================
-    # FORMATAR DATA (ROBUSTO — SEM DEPENDER DO DTYPE)
-    # ======================================================
-    df_display["Último Pedido"] = (
-        pd.to_datetime(
-            df_input["Último Pedido"],
-            errors="coerce",
-        )
-        .dt.strftime("%d/%m/%Y %H:%M")
-        .fillna("-")
-    )
-    
-    return df_display
-
-
-# ======================================================
-# 🟢 BASE ATIVA (AGORA USA "Nível")
-# ======================================================
-st.subheader("🟢 Base ativa")
+    st.subheader(titulo)
 
-col_filtro1, col_info1 = st.columns([3, 1])
+    col_filtro, col_info = st.columns([3, 1])
 
-with col_filtro1:
-    filtro_ativa = st.multiselect(
-        "Filtrar Base ativa por nível",
-        CLASSIFICACOES,
-        default=CLASSIFICACOES,
-        key="filtro_ativa"
-    )
+    with col_filtro:
+        filtro = st.multiselect(
+            rotulo_filtro,
+            CLASSIFICACOES,
+            default=CLASSIFICACOES,
+            key=chave_filtro
+        )
 
-df_ativa = (
-    df[
-        (df["Estado Operacional"] == "🟢 Ativo") &
-        (df["Nível"].isin(filtro_ativa))
-    ]
-    .sort_values("Último Pedido", ascending=False)
-)
+    # Partição já ordenada por "Último Pedido" (desc) no carregamento
+    df_secao = segmentos[estado]
 
+    # Todos os níveis marcados (padrão): nada a filtrar
+    if len(filtro) < len(CLASSIFICACOES):
+        df_secao = df_secao[df_secao["Nível"].isin(filtro)]
 
-with col_info1:
-    st.metric("Total", len(df_ativa))
+    with col_info:
+        st.metric("Total", len(df_secao))
 
-if not df_ativa.empty:
-    df_ativa_display = formatar_tabela(df_ativa)
-    st.dataframe(
-        df_ativa_display, 
-        use_container_width=True, 
-        height=400,
-        hide_index=True
-    )
-else:
-    st.info("Nenhum cliente encontrado com os filtros selecionados.")
-
-st.divider()
+    if not df_secao.empty:
+        st.dataframe(
+            df_secao,
+            use_container_width=True,
+            height=400,
+            hide_index=True
+        )
+    else:
+        st.info(mensagem_vazia)
 
 
 # ======================================================
-# 🚨 EM RISCO (AGORA USA "Nível")
+# 🟢 BASE ATIVA / 🚨 EM RISCO / 💤 DORMENTES
 # ======================================================
-st.subheader("🚨 Em risco — ação imediata")
-
-col_filtro2, col_info2 = st.columns([3, 1])
-
-with col_filtro2:
-    filtro_risco = st.multiselect(
-        "Filtrar Em risco por nível",
-        CLASSIFICACOES,
-        default=CLASSIFICACOES,
-        key="filtro_risco"
-    )
-
-df_risco = (
-    df[
-        (df["Estado Operacional"] == "🚨 Em risco") &
-        (df["Nível"].isin(filtro_risco))
-    ]
-    .sort_values("Último Pedido", ascending=False)
+render_secao(
+    "🟢 Base ativa",
+    "🟢 Ativo",
+    "Filtrar Base ativa por nível",
+    "filtro_ativa",
+    "Nenhum cliente encontrado com os filtros selecionados."
 )
 
-
-with col_info2:
-    st.metric("Total", len(df_risco))
-
-if not df_risco.empty:
-    df_risco_display = formatar_tabela(df_risco)
-    st.dataframe(
-        df_risco_display, 
-        use_container_width=True, 
-        height=400,
-        hide_index=True
-    )
-else:
-    st.info("✅ Nenhum cliente em risco no momento!")
-
 st.divider()
 
-
-# ======================================================
-# 💤 DORMENTES (AGORA USA "Nível")
-# ======================================================
-st.subheader("💤 Dormentes — reativação")
-
-col_filtro3, col_info3 = st.columns([3, 1])
-
-with col_filtro3:
-    filtro_dormentes = st.multiselect(
-        "Filtrar Dormentes por nível",
-        CLASSIFICACOES,
-        default=CLASSIFICACOES,
-        key="filtro_dormentes"
-    )
-
-df_dormentes = (
-    df[
-        (df["Estado Operacional"] == "💤 Dormente") &
-        (df["Nível"].isin(filtro_dormentes))
-    ]
-    .sort_values("Último Pedido", ascending=False)
+render_secao(
+    "🚨 Em risco — ação imediata",
+    "🚨 Em risco",
+    "Filtrar Em risco por nível",
+    "filtro_risco",
+    "✅ Nenhum cliente em risco no momento!"
 )
 
+st.divider()
 
-with col_info3:
-    st.metric("Total", len(df_dormentes))
-
-if not df_dormentes.empty:
-    df_dormentes_display = formatar_tabela(df_dormentes)
-    st.dataframe(
-        df_dormentes_display, 
-        use_container_width=True, 
-        height=400,
-        hide_index=True
-    )
-else:
-    st.info("✅ Nenhum cliente dormente no momento!")
+render_secao(
+    "💤 Dormentes — reativação",
+    "💤 Dormente",
+    "Filtrar Dormentes por nível",
+    "filtro_dormentes",
+    "✅ Nenhum cliente dormente no momento!"
+)
 
 
 # ======================================================
@@ -428,6 +519,6 @@ else:
 st.divider()
 st.caption(
     f"🔄 Cache: 20 minutos | "
-    f"📅 Última atualização: {pd.Timestamp.now().strftime('%d/%m/%Y %H:%M:%S')} | "
+    f"📅 Última atualização: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')} | "
     f"📊 Total de registros: {len(df)}"
 )
@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# Permite "from utils..." rodando o pytest a partir de qualquer pasta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,39 @@
+# tests/test_classificacao.py
+
+import warnings
+
+import pandas as pd
+
+from utils.classificacao import converter_categoria
+
+
+ESTADOS = ["🟢 Ativo", "🚨 Em risco", "💤 Dormente"]
+NIVEIS = ["Iniciante", "Promissor", "Leal", "Campeão"]
+
+
+def _aba_clientes() -> pd.DataFrame:
+    # Como o ler_aba devolve: cliente sem estado/nível vem como ""
+    return pd.DataFrame({
+        "Customer ID": ["1", "2", "3", "4"],
+        "Estado": ["🟢 Ativo", "", "💤 Dormente", "desconhecido"],
+        "Nível": ["Campeão", "", "Leal", "Iniciante"],
+    })
+
+
+def test_converter_categoria_celulas_vazias_sem_warning():
+    df = _aba_clientes()
+    tipos = {
+        "Estado": pd.CategoricalDtype(ESTADOS),
+        "Nível": pd.CategoricalDtype(NIVEIS, ordered=True),
+    }
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        for col, tipo in tipos.items():
+            df[col] = converter_categoria(df[col], tipo)
+
+    assert df["Estado"].dtype == tipos["Estado"]
+    assert df["Nível"].dtype == tipos["Nível"]
+    assert df["Estado"].isna().tolist() == [False, True, False, True]
+    assert df["Nível"].isna().tolist() == [False, True, False, False]
+    assert df["Nível"].iloc[0] == "Campeão"
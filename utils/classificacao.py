@@ -1,19 +1,10 @@
 # utils/classificacao.py
 
 import pandas as pd
+import numpy as np
 import pytz
 from typing import Dict, List
 
-def _telefone_mais_recente(series: pd.Series) -> str:
-    validos = (
-        series
-        .dropna()
-        .astype(str)
-        .str.strip()
-    )
-    validos = validos[validos != ""]
-    return validos.iloc[-1] if not validos.empty else ""
-
 
 # ======================================================
 # AGREGAÇÃO DE PEDIDOS POR CLIENTE
@@ -69,33 +60,46 @@ def agregar_por_cliente(df_pedidos: pd.DataFrame) -> pd.DataFrame:
             f"❌ Colunas obrigatórias ausentes: {', '.join(colunas_faltantes)}"
         )
 
-    df_pedidos["Customer ID"] = (
+    # Customer ID limpo numa passada; "nan"/vazio saem pela máscara
+    customer_id = (
         df_pedidos["Customer ID"]
         .astype(str)
-        .replace("nan", "")
         .str.replace(".0", "", regex=False)
         .str.strip()
     )
+    valido = ~customer_id.isin(["", "nan"])
+
+    # Telefone vazio vira NaN para o "last" pegar o mais recente válido
+    telefones = df_pedidos["Telefone"].dropna().astype(str).str.strip()
 
-    df_pedidos = df_pedidos[df_pedidos["Customer ID"] != ""]
+    # Um único recorte + atribuição (sem alterar o DataFrame recebido)
+    df_pedidos = df_pedidos[valido].assign(**{
+        "Customer ID": customer_id,
+        "Telefone": telefones[telefones != ""],
+    })
 
     
     # ======================================================
-    # 2. AGREGAÇÃO
+    # 2. AGREGAÇÃO (SÓ REDUÇÕES NATIVAS — SEM LAMBDA POR GRUPO)
     # ======================================================
     df_clientes = (
         df_pedidos
-        .groupby("Customer ID", as_index=False)
+        .groupby("Customer ID", as_index=False, sort=False)  # ordem final vem do passo 5
         .agg(
             Cliente=("Cliente", "last"),
-            Email=("Email", lambda x: x.dropna().iloc[-1] if not x.dropna().empty else ""),
-            Telefone=("Telefone", _telefone_mais_recente),
-            Qtd_Pedidos=("Pedido ID", pd.Series.nunique),
+            Email=("Email", "last"),
+            Telefone=("Telefone", "last"),
+            Qtd_Pedidos=("Pedido ID", "nunique"),
             Valor_Total=("Valor Total", "sum"),
             Primeiro_Pedido=("Data de criação", "min"),
             Ultimo_Pedido=("Data de criação", "max"),
         )
     )
+
+    # "last" ignora nulos; cliente sem nenhum valor fica vazio
+    df_clientes[["Email", "Telefone"]] = (
+        df_clientes[["Email", "Telefone"]].fillna("")
+    )
     
     # Renomear colunas para padrão final
     df_clientes = df_clientes.rename(columns={
@@ -108,38 +112,31 @@ def agregar_por_cliente(df_pedidos: pd.DataFrame) -> pd.DataFrame:
     # ======================================================
     # 3. CALCULAR DIAS SEM COMPRAR
     # ======================================================
-    df_clientes = df_clientes.copy()
-    
-    df_clientes["Último Pedido"] = pd.to_datetime(
-        df_clientes["Último Pedido"],
-        errors="coerce"
-    )
+    # (rename já devolve um DataFrame novo — sem .copy() extra)
+    # O sync já entrega "Data de criação" como datetime: só re-parseia se vier texto
+    df_clientes["Último Pedido"] = _garantir_datetime(df_clientes["Último Pedido"])
 
     hoje = pd.Timestamp.now(
         tz=pytz.timezone("America/Sao_Paulo")
     ).tz_localize(None)
     
-    df_clientes["Dias sem comprar"] = (
-        hoje - df_clientes["Último Pedido"]
-    ).dt.days
-    
+    # Divisão inteira direto no array timedelta64 (mesmo piso do .dt.days)
+    validos = df_clientes["Último Pedido"].notna().to_numpy()
+    delta = (hoje - df_clientes["Último Pedido"]).to_numpy()
+
     # Datas inválidas ficam como NaN
-    df_clientes.loc[
-        df_clientes["Último Pedido"].isna(),
-        "Dias sem comprar"
-    ] = None
-    
-    # Garantir que não há valores negativos
-    df_clientes["Dias sem comprar"] = (
-        df_clientes["Dias sem comprar"].clip(lower=0)
-    )
+    dias = np.full(len(delta), np.nan)
+    dias[validos] = delta[validos] // np.timedelta64(1, "D")
+    
+    # Garantir que não há valores negativos (NaN é preservado)
+    df_clientes["Dias sem comprar"] = np.clip(dias, 0, None)
     
     # ======================================================
     # 4. CLASSIFICAR CLIENTES (COLUNA "Nível")
     # ======================================================
-    df_clientes["Nível"] = df_clientes.apply(
-        _calcular_classificacao, 
-        axis=1
+    df_clientes["Nível"] = _calcular_classificacao(
+        df_clientes["Qtd Pedidos"],
+        df_clientes["Valor Total"]
     )
     
     # ======================================================
@@ -179,20 +176,28 @@ def agregar_por_cliente(df_pedidos: pd.DataFrame) -> pd.DataFrame:
 # ======================================================
 # CLASSIFICAÇÃO RFM (Recency, Frequency, Monetary)
 # ======================================================
-def _calcular_classificacao(row) -> str:
-    qtd = row["Qtd Pedidos"]
-    valor = row["Valor Total"]
-
-    if qtd >= 5 or valor >= 700:
-        return "Campeão"
+def _calcular_classificacao(qtd: pd.Series, valor: pd.Series) -> np.ndarray:
+    # Regras avaliadas em ordem: a primeira condição verdadeira vence
+    return np.select(
+        [
+            (qtd >= 5) | (valor >= 700),
+            (qtd >= 3) | (valor >= 500),
+            (qtd >= 2) | (valor >= 300),
+        ],
+        ["Campeão", "Leal", "Promissor"],
+        default="Iniciante"
+    )
 
-    if qtd >= 3 or valor >= 500:
-        return "Leal"
 
-    if qtd >= 2 or valor >= 300:
-        return "Promissor"
+# ======================================================
+# DATAS: SÓ CONVERTE O QUE AINDA É TEXTO
+# ======================================================
+def _garantir_datetime(serie: pd.Series) -> pd.Series:
+    # Loader do painel e sync já entregam datetime — nada a re-parsear
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie
 
-    return "Iniciante"
+    return pd.to_datetime(serie, errors="coerce")
 
 
 # ======================================================
@@ -230,51 +235,38 @@ def calcular_ciclo_medio(df_clientes: pd.DataFrame) -> Dict:
             "total_recorrentes": 0
         }
 
-    # 🔒 GARANTIR QUE AS DATAS SÃO DATETIME
-    df_clientes = df_clientes.copy()
-
-    df_clientes["Primeiro Pedido"] = pd.to_datetime(
-        df_clientes["Primeiro Pedido"],
-        errors="coerce"
-    )
-
-    df_clientes["Último Pedido"] = pd.to_datetime(
-        df_clientes["Último Pedido"],
-        errors="coerce"
-    )
+    # 🔒 GARANTIR QUE AS DATAS SÃO DATETIME (só as colunas usadas, sem copiar a base)
+    primeiro_pedido = _garantir_datetime(df_clientes["Primeiro Pedido"])
+    ultimo_pedido = _garantir_datetime(df_clientes["Último Pedido"])
 
     
     # Filtrar apenas clientes com 2+ pedidos
-    clientes_recorrentes = df_clientes[df_clientes["Qtd Pedidos"] >= 2].copy()
+    recorrentes = df_clientes["Qtd Pedidos"] >= 2
+    total_recorrentes = int(np.count_nonzero(recorrentes))
     
-    if len(clientes_recorrentes) < 5:
+    if total_recorrentes < 5:
         # Poucos dados para análise confiável
         return {
             "ciclo_mediana": None,
             "ciclo_media": None,
             "limite_risco": 60,
             "limite_dormente": 120,
-            "total_recorrentes": len(clientes_recorrentes)
+            "total_recorrentes": total_recorrentes
         }
     
     # Calcular dias totais entre primeira e última compra
-    clientes_recorrentes["Dias_Total"] = (
-        clientes_recorrentes["Último Pedido"] - 
-        clientes_recorrentes["Primeiro Pedido"]
+    dias_total = (
+        ultimo_pedido[recorrentes] - 
+        primeiro_pedido[recorrentes]
     ).dt.days
     
     # Calcular ciclo médio (dias totais / quantidade de intervalos)
-    clientes_recorrentes["Ciclo_Medio"] = (
-        clientes_recorrentes["Dias_Total"] / 
-        (clientes_recorrentes["Qtd Pedidos"] - 1)
-    )
+    ciclo_medio = dias_total / (df_clientes["Qtd Pedidos"][recorrentes] - 1)
     
     # Remover valores inválidos (zero ou negativos)
-    clientes_recorrentes = clientes_recorrentes[
-        clientes_recorrentes["Ciclo_Medio"] > 0
-    ]
+    ciclo_medio = ciclo_medio[ciclo_medio > 0]
     
-    if clientes_recorrentes.empty:
+    if ciclo_medio.empty:
         return {
             "ciclo_mediana": None,
             "ciclo_media": None,
@@ -284,8 +276,8 @@ def calcular_ciclo_medio(df_clientes: pd.DataFrame) -> Dict:
         }
     
     # Estatísticas
-    ciclo_mediana = clientes_recorrentes["Ciclo_Medio"].median()
-    ciclo_media = clientes_recorrentes["Ciclo_Medio"].mean()
+    ciclo_mediana = ciclo_medio.median()
+    ciclo_media = ciclo_medio.mean()
     
     # Calcular thresholds sugeridos
     threshold_ativo = max(30, int(ciclo_mediana * 1.5))
@@ -296,7 +288,7 @@ def calcular_ciclo_medio(df_clientes: pd.DataFrame) -> Dict:
         "ciclo_media": round(ciclo_media, 1),
         "limite_risco": threshold_ativo,      # ex: ~60
         "limite_dormente": threshold_risco,   # ex: ~120
-        "total_recorrentes": len(clientes_recorrentes)
+        "total_recorrentes": len(ciclo_medio)
     }
 
 # ======================================================
@@ -321,22 +313,14 @@ def calcular_estado(
     df_clientes = df_clientes.copy()
 
     # ✅ Considerar apenas clientes com dias válidos
-    df_validos = df_clientes[df_clientes["Dias sem comprar"].notna()].copy()
-
-    def _classificar_estado(dias):
-        if dias >= threshold_dormente:
-            return "💤 Dormente"
-        if dias >= threshold_risco:
-            return "🚨 Em risco"
-        return "🟢 Ativo"
-
-    df_validos["Estado"] = df_validos["Dias sem comprar"].apply(_classificar_estado)
-
-    # 🔁 Reintegrar com a base original
-    df_clientes = df_clientes.merge(
-        df_validos[["Customer ID", "Estado"]],
-        on="Customer ID",
-        how="left"
+    dias = df_clientes["Dias sem comprar"]
+
+    # Faixas em uma passada vetorizada (mesma ordem: dormente > risco > ativo);
+    # clientes sem dias válidos ficam sem estado
+    df_clientes["Estado"] = np.select(
+        [dias.isna(), dias >= threshold_dormente, dias >= threshold_risco],
+        [None, "💤 Dormente", "🚨 Em risco"],
+        default="🟢 Ativo"
     )
 
     return df_clientes
@@ -394,6 +378,33 @@ def filtrar_por_classificacao(
     return df_clientes[df_clientes["Nível"].isin(classificacoes)].copy()
 
 
+# ======================================================
+# RÓTULOS → CATEGORIA FIXA (NÍVEL / ESTADO)
+# ======================================================
+def converter_categoria(
+    serie: pd.Series,
+    tipo: pd.CategoricalDtype
+) -> pd.Series:
+    """
+    Converte uma coluna de rótulos para um CategoricalDtype fixo.
+
+    Rótulos fora das categorias (ex: "" gravado para cliente sem estado
+    ou nível) viram NaN explicitamente antes do cast; o pandas depreciou
+    esse descarte implícito e vai passar a levantar erro.
+
+    Args:
+        serie: Pandas Series com os rótulos em texto
+        tipo: CategoricalDtype com as categorias aceitas
+
+    Returns:
+        pd.Series: Série categórica (NaN onde o rótulo é desconhecido)
+
+    Exemplo:
+        >>> df["Nível"] = converter_categoria(df["Nível"], TIPOS_CATEGORICOS["Nível"])
+    """
+    return serie.where(serie.isin(tipo.categories)).astype(tipo)
+
+
 # ======================================================
 # MÉTRICAS AGREGADAS
 # ======================================================
@@ -412,7 +423,7 @@ def calcular_metricas_gerais(df_clientes: pd.DataFrame) -> Dict:
             "total_campeoes": int,
             "total_leais": int,
             "total_promissores": int,
-            "total_novos": int,
+            "total_iniciantes": int,
             "total_ativos": int,
             "total_em_risco": int,
             "total_dormentes": int
@@ -431,7 +442,7 @@ def calcular_metricas_gerais(df_clientes: pd.DataFrame) -> Dict:
             "total_campeoes": 0,
             "total_leais": 0,
             "total_promissores": 0,
-            "total_novos": 0,
+            "total_iniciantes": 0,
             "total_ativos": 0,
             "total_em_risco": 0,
             "total_dormentes": 0
@@ -8,6 +8,19 @@ from google.oauth2.service_account import Credentials
 from typing import Set
 
 
+# Caracteres invisíveis que quebram parsing (uma única passada via translate)
+_INVISIVEIS = str.maketrans({
+    "\xa0": " ",    # Non-breaking space
+    "\u200b": None,  # Zero-width space
+})
+
+# "R$ 1.234,56" → "1234.56": remove símbolo, espaços e milhar; vírgula vira ponto
+_MOEDA_BR = str.maketrans({
+    **dict.fromkeys("R$ \t\n\r\xa0\u202f."),
+    ",": ".",
+})
+
+
 # ======================================================
 # CONEXÃO GOOGLE SHEETS
 # ======================================================
@@ -74,10 +87,8 @@ def _converter_valor_br_para_float(serie: pd.Series) -> pd.Series:
     Converte valores em formato brasileiro (R$ 1.234,56) para float.
     
     Transformações aplicadas:
-    - Remove "R$"
-    - Remove espaços
-    - Remove ponto (separador de milhar)
-    - Troca vírgula por ponto (decimal)
+    - Remove "R$", espaços e ponto (separador de milhar) e troca
+      vírgula por ponto (decimal) numa única passada (str.translate)
     - Converte para numérico
     - Preenche NaN com 0
     
@@ -95,16 +106,50 @@ def _converter_valor_br_para_float(serie: pd.Series) -> pd.Series:
     return (
         serie
         .astype(str)
-        .str.replace("R$", "", regex=False)
-        .str.replace(" ", "", regex=False)
-        .str.replace(".", "", regex=False)   # Remove separador de milhar
-        .str.replace(",", ".", regex=False)  # Vírgula → ponto decimal
-        .str.strip()
+        .str.translate(_MOEDA_BR)
         .pipe(pd.to_numeric, errors="coerce")
         .fillna(0)
     )
 
 
+# ======================================================
+# CONVERSÃO DE DATAS DA PLANILHA
+# ======================================================
+def converter_datas_planilha(serie: pd.Series, utc: bool = False) -> pd.Series:
+    """
+    Converte datas da planilha para datetime sem nunca levantar erro.
+
+    Caminho rápido com format="ISO8601" (o que o sync grava,
+    "%Y-%m-%d %H:%M:%S", e variantes com offset); só o que não casar
+    com ISO passa pelo parser genérico do pandas (ex: "01/05/2024 10:00").
+
+    As duas passadas rodam com utc=True, então valores com e sem offset
+    (ou offsets diferentes) nunca entram em conflito: texto sem offset
+    mantém o horário escrito, com offset é convertido para UTC.
+
+    Args:
+        serie: Pandas Series com as datas em texto
+        utc: True devolve datetime com fuso UTC; False (padrão) devolve naive
+
+    Returns:
+        pd.Series: Série datetime (NaT onde não foi possível converter)
+
+    Exemplo:
+        >>> converter_datas_planilha(df["Data de criação"], utc=True)
+    """
+    datas = pd.to_datetime(serie, format="ISO8601", errors="coerce", utc=True)
+
+    residuo = datas.isna() & serie.notna() & (serie.astype(str) != "")
+
+    if residuo.any():
+        # Série separada + combine_first (mesmo fuso nas duas, sem cast no setitem)
+        datas = datas.combine_first(
+            pd.to_datetime(serie[residuo], errors="coerce", utc=True)
+        )
+
+    return datas if utc else datas.dt.tz_localize(None)
+
+
 # ======================================================
 # LEITURA (SANITIZADA E COM CONVERSÃO AUTOMÁTICA)
 # ======================================================
@@ -147,8 +192,7 @@ def ler_aba(planilha: str, aba: str) -> pd.DataFrame:
         df[col] = (
             df[col]
             .astype(str)
-            .str.replace("\xa0", " ", regex=False)  # Non-breaking space
-            .str.replace("\u200b", "", regex=False)  # Zero-width space
+            .str.translate(_INVISIVEIS)
             .str.strip()
         )
     
@@ -159,12 +203,57 @@ def ler_aba(planilha: str, aba: str) -> pd.DataFrame:
     return df
 
 
+# ======================================================
+# LEITURA DE UMA ÚNICA COLUNA
+# ======================================================
+def ler_coluna(planilha: str, aba: str, coluna: str) -> pd.Series:
+    """
+    Lê apenas uma coluna da aba, localizada pelo nome no cabeçalho.
+    
+    Baixa só o cabeçalho e a coluna pedida, em vez da aba inteira
+    (get_all_records). Aplica a mesma limpeza de invisíveis do ler_aba.
+    
+    Args:
+        planilha: Nome da planilha
+        aba: Nome da aba/worksheet
+        coluna: Nome da coluna no cabeçalho
+    
+    Returns:
+        pd.Series: Valores da coluna (texto, sem o cabeçalho);
+                   vazia se a coluna não existir
+    
+    Raises:
+        ValueError: Se aba não existir
+    """
+    sh = abrir_planilha(planilha)
+
+    try:
+        ws = sh.worksheet(aba)
+    except gspread.WorksheetNotFound:
+        raise ValueError(
+            f"❌ Aba '{aba}' não encontrada na planilha '{planilha}'!"
+        )
+
+    cabecalho = [str(c).strip() for c in ws.row_values(1)]
+
+    if coluna not in cabecalho:
+        return pd.Series(dtype=object, name=coluna)
+
+    valores = ws.col_values(cabecalho.index(coluna) + 1)[1:]
+
+    return (
+        pd.Series(valores, dtype=object, name=coluna)
+        .str.translate(_INVISIVEIS)
+        .str.strip()
+    )
+
+
 # ======================================================
 # NORMALIZAÇÃO DE IDs
 # ======================================================
-def _normalizar_id(valor) -> str:
+def _normalizar_ids(serie: pd.Series) -> pd.Series:
     """
-    Normaliza IDs para comparação consistente.
+    Normaliza IDs para comparação consistente (vetorizado).
     
     Remove:
     - Decimais desnecessários (.0)
@@ -172,24 +261,22 @@ def _normalizar_id(valor) -> str:
     - Espaços em branco
     
     Args:
-        valor: ID para normalizar (qualquer tipo)
+        serie: Pandas Series com IDs (qualquer tipo)
     
     Returns:
-        str: ID normalizado
+        pd.Series: IDs normalizados como texto (vazios viram "")
     
     Exemplos:
         123.0 → "123"
         "456.0" → "456"
         "789," → "789"
     """
-    if valor is None or valor == "":
-        return ""
-    
     return (
-        str(valor)
-        .replace(".0", "")
-        .replace(",", "")
-        .strip()
+        serie
+        .fillna("")
+        .astype(str)
+        .str.replace(r"\.0|,", "", regex=True)
+        .str.strip()
     )
 
 
@@ -214,21 +301,59 @@ def ler_ids_existentes(planilha: str, aba: str, coluna_id: str) -> Set[str]:
         >>>     # Inserir novo pedido
     """
     try:
-        df = ler_aba(planilha, aba)
+        ids = ler_coluna(planilha, aba, coluna_id)
 
-        if df.empty or coluna_id not in df.columns:
+        if ids.empty:
             return set()
 
-        return set(
-            df[coluna_id]
-            .apply(_normalizar_id)
-            .tolist()
-        )
+        return set(_normalizar_ids(ids).tolist())
     except (ValueError, FileNotFoundError, gspread.WorksheetNotFound):
         # Aba não existe ou está vazia
         return set()
 
 
+# ======================================================
+# SERIALIZAÇÃO PARA O SHEETS (COLUNA A COLUNA)
+# ======================================================
+def _serializar_linhas(df: pd.DataFrame) -> list:
+    """
+    Converte o DataFrame nas linhas de valores enviadas ao Google Sheets.
+    
+    Regras por célula:
+    🔒 Telefone SEMPRE como texto (prefixo ')
+    ✅ números reais continuam números
+    ✅ NaN/None vira string vazia
+    ✅ resto vira string
+    
+    Processa uma coluna por vez (sem iterrows, que monta uma Series
+    por linha) e transpõe no final.
+    
+    Args:
+        df: DataFrame a serializar
+    
+    Returns:
+        list: Uma lista de valores por linha (sem cabeçalho)
+    """
+    colunas = []
+
+    for i, col in enumerate(df.columns):
+        valores = df.iloc[:, i].to_numpy(dtype=object)
+        nulos = pd.isna(valores)
+
+        if col == "Telefone":
+            colunas.append([
+                "" if nulo or not str(val).strip() else f"'{val}"
+                for val, nulo in zip(valores, nulos)
+            ])
+        else:
+            colunas.append([
+                "" if nulo else val if isinstance(val, (int, float)) else str(val)
+                for val, nulo in zip(valores, nulos)
+            ])
+
+    return [list(linha) for linha in zip(*colunas)]
+
+
 # ======================================================
 # ESCRITA INCREMENTAL (APPEND)
 # ======================================================
@@ -255,29 +380,7 @@ def append_aba(planilha: str, aba: str, df: pd.DataFrame):
         ws = sh.add_worksheet(title=aba, rows=1000, cols=20)
         ws.append_row(df.columns.tolist())
 
-    valores = []
-
-    for _, row in df.iterrows():
-        linha = []
-        for col, val in zip(df.columns, row):
-
-            # 🔒 TELEFONE: força texto no Google Sheets
-            if col == "Telefone":
-                linha.append(f"'{val}" if pd.notna(val) and str(val).strip() else "")
-
-            # ✅ números reais continuam números
-            elif pd.notna(val) and isinstance(val, (int, float)):
-                linha.append(val)
-
-            # vazio
-            elif pd.isna(val):
-                linha.append("")
-
-            # resto vira string
-            else:
-                linha.append(str(val))
-
-        valores.append(linha)
+    valores = _serializar_linhas(df)
 
     ws.append_rows(
         valores,
@@ -309,29 +412,7 @@ def escrever_aba(planilha: str, aba: str, df: pd.DataFrame):
 
     ws.clear()
 
-    valores = [df.columns.tolist()]
-
-    for _, row in df.iterrows():
-        linha = []
-        for col, val in zip(df.columns, row):
-
-            # 🔒 TELEFONE: força texto no Google Sheets
-            if col == "Telefone":
-                linha.append(f"'{val}" if pd.notna(val) and str(val).strip() else "")
-
-            # ✅ números reais continuam números
-            elif pd.notna(val) and isinstance(val, (int, float)):
-                linha.append(val)
-
-            # vazio
-            elif pd.isna(val):
-                linha.append("")
-
-            # resto vira string
-            else:
-                linha.append(str(val))
-
-        valores.append(linha)
+    valores = [df.columns.tolist()] + _serializar_linhas(df)
 
     ws.update(
         valores,
@@ -8,6 +8,24 @@ import hashlib
 from typing import Generator, Dict, List, Optional
 
 
+# ======================================================
+# CAMPOS USADOS DO PEDIDO (RESPOSTA ENXUTA DA API)
+# ======================================================
+CAMPOS_PEDIDO = ",".join([
+    "id",
+    "created_at",
+    "email",
+    "customer",
+    "shipping_address",
+    "billing_address",
+    "total_price",
+    "order_number",
+    "financial_status",
+    "cancelled_at",
+    "total_refunded",
+])
+
+
 # ======================================================
 # BUSCAR PEDIDOS PAGOS EM LOTES
 # ======================================================
@@ -42,7 +60,8 @@ def puxar_pedidos_pagos_em_lotes(
         "status": "any",
         "limit": 250,
         "created_at_min": data_inicio,
-        "order": f"created_at {ordem}"
+        "order": f"created_at {ordem}",
+        "fields": CAMPOS_PEDIDO
     }
 
     buffer = []
@@ -1,6 +1,7 @@
 # utils/sync.py
 
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
 import pytz
 import re
@@ -27,12 +28,30 @@ def normalizar_telefone_br(telefone: str) -> str:
     return f"+55{digits}"
 
 
+def normalizar_telefones_br(telefones: pd.Series) -> pd.Series:
+    """
+    Versão vetorizada de normalizar_telefone_br para uma coluna inteira:
+    as regex rodam uma vez sobre a Series, não uma vez por linha.
+    """
+    digits = (
+        telefones
+        .fillna("")
+        .astype(str)
+        .str.replace(r"\D", "", regex=True)         # só números
+        .str.replace(r"^0?(?:55)?", "", regex=True)  # 0 inicial e DDI 55
+    )
+
+    # DDD + número (10 ou 11 dígitos), senão vazio
+    return ("+55" + digits).where(digits.str.len().isin([10, 11]), "")
+
+
 from utils.shopify import puxar_pedidos_pagos_em_lotes
 from utils.sheets import (
     append_aba,
     ler_ids_existentes,
     ler_aba,
-    escrever_aba
+    escrever_aba,
+    converter_datas_planilha
 )
 from utils.classificacao import agregar_por_cliente, calcular_estado, calcular_ciclo_medio
 
@@ -66,6 +85,11 @@ COLUNAS_PEDIDOS_IGNORADOS = [
     "Motivo Ignorado"
 ]
 
+# ======================================================
+# ✍️ ESCRITA EM LOTES GRANDES (MENOS CHAMADAS À API DO SHEETS)
+# ======================================================
+LOTE_ESCRITA = 5000  # linhas acumuladas por append na aba de pedidos
+
 # ======================================================
 # UTIL — DATA DE INÍCIO (ONTEM 00:00)
 # ======================================================
@@ -76,30 +100,74 @@ def _data_inicio_ontem() -> str:
 
 
 # ======================================================
-# SINCRONIZAÇÃO COMPLETA (BOTÃO MANUAL)
+# UTIL — MOTIVO DE PEDIDO IGNORADO (VETORIZADO)
 # ======================================================
-def sincronizar_shopify_completo(
-    nome_planilha: str = "Clientes Shopify",
-    lote_tamanho: int = 500
-) -> dict:
-    todos_pedidos = []
+def _identificar_motivos(df: pd.DataFrame) -> np.ndarray:
+    """
+    Define o motivo de cada pedido ignorado numa única passada:
+    cancelado > reembolso > outro.
+    """
+    return np.select(
+        [
+            df["Cancelled At"].notna(),
+            df["Total Refunded"] >= df["Valor Total"]
+        ],
+        ["cancelado", "reembolso"],
+        default="outro"
+    )
 
-    # 🔄 REBUILD TOTAL — limpar pedidos ignorados
-    escrever_aba(
-        planilha=nome_planilha,
-        aba="Pedidos Ignorados",
-        df=pd.DataFrame(columns=COLUNAS_PEDIDOS_IGNORADOS)
+
+# ======================================================
+# UTIL — IDS AINDA NÃO REGISTRADOS
+# ======================================================
+def _ids_novos(ids: pd.Series, existentes: set) -> np.ndarray:
+    """
+    Máscara dos IDs do lote que ainda não estão em `existentes`.
+
+    Consulta o set direto (custo proporcional ao lote); Series.isin(set)
+    converteria o set inteiro em array e refaria a tabela hash a cada lote.
+    """
+    return np.fromiter(
+        (i not in existentes for i in ids),
+        dtype=bool,
+        count=len(ids)
     )
 
-    ids_ignorados = set()
 
-    def identificar_motivo(row):
-        if pd.notna(row.get("Cancelled At")):
-            return "cancelado"
-        if row.get("Total Refunded", 0) >= row.get("Valor Total", 0):
-            return "reembolso"
-        return "outro"
+# ======================================================
+# UTIL — BUFFER DE ESCRITA EM BLOCOS
+# ======================================================
+def _descarregar_buffer(
+    nome_planilha: str,
+    aba: str,
+    buffer: list,
+    minimo_linhas: int = 1
+):
+    """
+    Grava os DataFrames acumulados em `buffer` com um único append_aba
+    quando somarem ao menos `minimo_linhas` linhas; o buffer é esvaziado.
+
+    Use minimo_linhas=LOTE_ESCRITA dentro do loop e o padrão (1) no final.
+    """
+    if sum(len(df) for df in buffer) < minimo_linhas:
+        return
+
+    append_aba(
+        nome_planilha,
+        aba,
+        pd.concat(buffer, ignore_index=True)
+    )
+    buffer.clear()
+
 
+# ======================================================
+# SINCRONIZAÇÃO COMPLETA (BOTÃO MANUAL)
+# ======================================================
+def sincronizar_shopify_completo(
+    nome_planilha: str = "Clientes Shopify",
+    lote_tamanho: int = 500
+) -> dict:
+    registros = []  # pedidos crus de todos os lotes; um único DataFrame no final
 
     # 🔑 PUXAR DO MAIS ANTIGO → MAIS RECENTE
     for lote in puxar_pedidos_pagos_em_lotes(
@@ -107,82 +175,69 @@ def sincronizar_shopify_completo(
         data_inicio="2023-01-01T00:00:00-03:00",
         ordem="asc"
     ):
-        df = pd.DataFrame(lote)
+        registros.extend(lote)
 
+    df = pd.DataFrame(registros)
+
+    df_cancelados = pd.DataFrame(columns=COLUNAS_PEDIDOS_IGNORADOS)
+    df_pedidos = pd.DataFrame(columns=COLUNAS_PEDIDOS)
+
+    if not df.empty:
         if "Telefone" in df.columns:
-            df["Telefone"] = df["Telefone"].apply(normalizar_telefone_br)
+            df["Telefone"] = normalizar_telefones_br(df["Telefone"])
 
-        
         df["Pedido ID"] = (
             df["Pedido ID"]
             .astype(str)
             .str.replace(".0", "", regex=False)
             .str.strip()
         )
-        
-        if df.empty:
-            continue
 
         # ==============================
         # 🚫 CANCELADOS / REEMBOLSADOS
         # ==============================
-        df_cancelados = df[
-            (df.get("Cancelled At").notna()) |
-            (df.get("Total Refunded", 0) >= df.get("Valor Total", 0))
-        ].copy()
-
-        if not df_cancelados.empty:
-            df_cancelados["Motivo Ignorado"] = df_cancelados.apply(
-                identificar_motivo,
-                axis=1
-            )
-
-            df_cancelados = df_cancelados[
-                ~df_cancelados["Pedido ID"].isin(ids_ignorados)
-            ]
-
-            if not df_cancelados.empty:
-                df_cancelados["Data de criação"] = (
-                    pd.to_datetime(
-                        df_cancelados["Data de criação"],
-                        errors="coerce",
-                        utc=True
-                    )
-                    .dt.tz_convert("America/Sao_Paulo")
-                    .dt.tz_localize(None)
-                    .dt.strftime("%Y-%m-%d %H:%M:%S")
-                )
-
-                df_cancelados = df_cancelados[COLUNAS_PEDIDOS_IGNORADOS]
+        # Máscara calculada uma vez — válidos são o complemento
+        mask_ignorado = (
+            df["Cancelled At"].notna() |
+            (df["Total Refunded"] >= df["Valor Total"])
+        )
 
-                append_aba(
-                    planilha=nome_planilha,
-                    aba="Pedidos Ignorados",
-                    df=df_cancelados
+        # Cada pedido ignorado entra uma única vez
+        df_cancelados = df[mask_ignorado].drop_duplicates("Pedido ID")
+
+        df_cancelados = df_cancelados.assign(**{
+            "Motivo Ignorado": _identificar_motivos(df_cancelados),
+            "Data de criação": (
+                pd.to_datetime(
+                    df_cancelados["Data de criação"],
+                    format="ISO8601",
+                    errors="coerce",
+                    utc=True
                 )
-
-                ids_ignorados.update(df_cancelados["Pedido ID"])
+                .dt.tz_convert("America/Sao_Paulo")
+                .dt.tz_localize(None)
+                .dt.strftime("%Y-%m-%d %H:%M:%S")
+            ),
+        })[COLUNAS_PEDIDOS_IGNORADOS]
 
         # ==============================
         # ✅ PEDIDOS VÁLIDOS
         # ==============================
-        df_validos = df[
-            (df.get("Cancelled At").isna()) &
-            (df.get("Total Refunded", 0) < df.get("Valor Total", 0))
-        ]
-
-        if not df_validos.empty:
-            todos_pedidos.extend(df_validos.to_dict("records"))
+        df_pedidos = df[~mask_ignorado]
 
+    # 🔄 REBUILD TOTAL — pedidos ignorados sobrescritos numa única escrita
+    escrever_aba(
+        planilha=nome_planilha,
+        aba="Pedidos Ignorados",
+        df=df_cancelados
+    )
 
-    if not todos_pedidos:
+    if df_pedidos.empty:
         return {
             "status": "warning",
             "mensagem": "⚠️ Nenhum pedido encontrado"
         }
 
-    df_pedidos = pd.DataFrame(todos_pedidos)
-
     # 🔒 CONTRATO FIXO
     df_pedidos = df_pedidos[COLUNAS_PEDIDOS]
 
@@ -190,6 +245,7 @@ def sincronizar_shopify_completo(
     df_pedidos["Data de criação"] = (
         pd.to_datetime(
             df_pedidos["Data de criação"],
+            format="ISO8601",
             errors="coerce",
             utc=True
         )
@@ -213,12 +269,13 @@ def sincronizar_shopify_completo(
         df=df_pedidos
     )
 
-    # 🔄 REAGREGAR CLIENTES
+    # 🔄 REAGREGAR CLIENTES (a partir do que já está em memória)
     return _reagregar_clientes(
         nome_planilha,
         {
             "mensagem": f"📦 Pedidos sincronizados (rebuild): {len(df_pedidos)}"
-        }
+        },
+        df_pedidos=df_pedidos
     )
 
 
@@ -249,8 +306,15 @@ def sincronizar_shopify_incremental(
 # ======================================================
 # REAGREGAR CLIENTES
 # ======================================================
-def _reagregar_clientes(nome_planilha: str, resultado_pedidos: dict) -> dict:
-    df_pedidos = ler_aba(nome_planilha, "Pedidos Shopify")
+def _reagregar_clientes(
+    nome_planilha: str,
+    resultado_pedidos: dict,
+    df_pedidos: pd.DataFrame = None
+) -> dict:
+    # Rebuild completo já tem os pedidos em memória — só relê a aba
+    # quando não recebe o DataFrame (incremental / CRON)
+    if df_pedidos is None:
+        df_pedidos = ler_aba(nome_planilha, "Pedidos Shopify")
 
     if df_pedidos.empty:
         return {
@@ -259,7 +323,7 @@ def _reagregar_clientes(nome_planilha: str, resultado_pedidos: dict) -> dict:
         }
 
     df_pedidos["Data de criação"] = (
-        pd.to_datetime(df_pedidos["Data de criação"], errors="coerce", utc=True)
+        converter_datas_planilha(df_pedidos["Data de criação"], utc=True)
         .dt.tz_convert("America/Sao_Paulo")
         .dt.tz_localize(None)
     )
@@ -312,6 +376,10 @@ def sincronizar_shopify_com_planilha(
 
     total_processados = total_novos = total_ignorados = 0
 
+    # Pedidos acumulados até LOTE_ESCRITA (um append por bloco e por aba)
+    pendentes = []
+    ignorados_pendentes = []
+
     for lote in puxar_pedidos_pagos_em_lotes(
         lote_tamanho,
         data_inicio,
@@ -321,7 +389,7 @@ def sincronizar_shopify_com_planilha(
         df = pd.DataFrame(lote)
 
         if "Telefone" in df.columns:
-            df["Telefone"] = df["Telefone"].apply(normalizar_telefone_br)
+            df["Telefone"] = normalizar_telefones_br(df["Telefone"])
 
         
         total_processados += len(df)
@@ -337,32 +405,24 @@ def sincronizar_shopify_com_planilha(
             .str.strip()
         )
 
-        def identificar_motivo(row):
-            if pd.notna(row.get("Cancelled At")):
-                return "cancelado"
-            if row.get("Total Refunded", 0) >= row.get("Valor Total", 0):
-                return "reembolso"
-            return "outro"
-
-        
         # ==================================================
         # 🚫 CANCELADOS / REEMBOLSADOS / ESTORNADOS
         # ==================================================
-        df_cancelados = df[
-            (df.get("Cancelled At").notna()) |
-            (df.get("Total Refunded", 0) >= df.get("Valor Total", 0))
-        ].copy()
+        # Máscara calculada uma vez — válidos são o complemento
+        mask_ignorado = (
+            df["Cancelled At"].notna() |
+            (df["Total Refunded"] >= df["Valor Total"])
+        )
+
+        df_cancelados = df[mask_ignorado].copy()
 
         if not df_cancelados.empty:
             # Definir motivo
-            df_cancelados["Motivo Ignorado"] = df_cancelados.apply(
-                identificar_motivo,
-                axis=1
-            )
+            df_cancelados["Motivo Ignorado"] = _identificar_motivos(df_cancelados)
 
             # Remover os que já foram ignorados antes
             df_cancelados = df_cancelados[
-                ~df_cancelados["Pedido ID"].isin(ids_ignorados)
+                _ids_novos(df_cancelados["Pedido ID"], ids_ignorados)
             ]
 
             if not df_cancelados.empty:
@@ -370,6 +430,7 @@ def sincronizar_shopify_com_planilha(
                 df_cancelados["Data de criação"] = (
                     pd.to_datetime(
                         df_cancelados["Data de criação"],
+                        format="ISO8601",
                         errors="coerce",
                         utc=True
                     )
@@ -381,25 +442,24 @@ def sincronizar_shopify_com_planilha(
                 # Garantir contrato da aba
                 df_cancelados = df_cancelados[COLUNAS_PEDIDOS_IGNORADOS]
 
-                append_aba(
-                    planilha=nome_planilha,
-                    aba="Pedidos Ignorados",
-                    df=df_cancelados
-                )
-
+                ignorados_pendentes.append(df_cancelados)
                 ids_ignorados.update(df_cancelados["Pedido ID"])
                 total_ignorados += len(df_cancelados)
 
+                _descarregar_buffer(
+                    nome_planilha,
+                    "Pedidos Ignorados",
+                    ignorados_pendentes,
+                    minimo_linhas=LOTE_ESCRITA
+                )
+
         # ==================================================
         # ✅ PEDIDOS VÁLIDOS
         # ==================================================
-        df_validos = df[
-            (df.get("Cancelled At").isna()) &
-            (df.get("Total Refunded", 0) < df.get("Valor Total", 0))
-        ]
+        df_validos = df[~mask_ignorado]
 
         df_validos = df_validos[
-            ~df_validos["Pedido ID"].isin(ids_pedidos)
+            _ids_novos(df_validos["Pedido ID"], ids_pedidos)
         ]
 
         if df_validos.empty:
@@ -411,6 +471,7 @@ def sincronizar_shopify_com_planilha(
         df_validos["Data de criação"] = (
             pd.to_datetime(
                 df_validos["Data de criação"],
+                format="ISO8601",
                 errors="coerce",
                 utc=True
             )
@@ -419,10 +480,21 @@ def sincronizar_shopify_com_planilha(
             .dt.strftime("%Y-%m-%d %H:%M:%S")
         )
         
-        append_aba(nome_planilha, "Pedidos Shopify", df_validos)
+        pendentes.append(df_validos)
         ids_pedidos.update(df_validos["Pedido ID"])
         total_novos += len(df_validos)
 
+        _descarregar_buffer(
+            nome_planilha,
+            "Pedidos Shopify",
+            pendentes,
+            minimo_linhas=LOTE_ESCRITA
+        )
+
+    # Gravar o que sobrou nos buffers
+    _descarregar_buffer(nome_planilha, "Pedidos Shopify", pendentes)
+    _descarregar_buffer(nome_planilha, "Pedidos Ignorados", ignorados_pendentes)
+
     return {
         "status": "success",
         "mensagem": (